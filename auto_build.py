@@ -6,7 +6,7 @@ This script loads the intelligent build manager and runs the build
 
 import os
 import sys
-import subprocess
+import importlib.util
 from pathlib import Path
 
 def main():
@@ -115,9 +115,13 @@ if __name__ == "__main__":
     # Check if any command-line arguments were provided
     args = ["build"] if len(sys.argv) < 2 else sys.argv[1:]
     
-    # Run the build manager with the provided arguments
-    result = subprocess.run([sys.executable, str(build_manager)] + args, check=False)
-    return result.returncode
+    # Run the build manager in this interpreter instead of starting a new one
+    spec = importlib.util.spec_from_file_location("auto_build_manager", build_manager)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    
+    sys.argv = [str(build_manager)] + args
+    return module.main() or 0
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -8,61 +8,195 @@ It learns from previous builds to improve performance over time.
 
 import os
 import sys
+import gzip
 import json
+import math
 import time
+import atexit
+import contextlib
+import hashlib
 import shutil
 import platform
+import tempfile
 import subprocess
-import multiprocessing
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
 # Configuration
-BUILD_HISTORY_FILE = "build_history.json"
+BUILD_HISTORY_FILE = "build_history.jsonl"
 OPTIMIZATION_FILE = "build_optimizations.json"
-DEFAULT_CONFIGS = {
+VCVARS_ENV_FILE = ".vcvars_env.json"
+CMD_CACHE_FILE = ".cmd_cache.json"
+CONFIGURE_HASH_FILE = ".drogon_configure.hash"
+HISTORY_TAIL = 20
+HISTORY_MAX_RECORDS = 1000
+ANALYZE_BATCH = 5
+# Default weight of the tuning band: higher favours stability, lower favours reacting quickly
+DEFAULT_STABILITY_PLASTICITY = 0.5
+# Config keys filled in by environment detection and reused while the environment is unchanged
+ENV_CACHE_KEYS = (
+    "vs_path", "vcvars_path", "vs_edition",
+    "has_ninja", "has_gcc", "has_clang",
+    "gcc_version", "clang_version",
+    "generator", "compiler"
+)
+_DEFAULT_CONFIGS = {
     "windows": {
         "generator": "Ninja",
         "compiler": "msvc",
-        "parallel_jobs": min(multiprocessing.cpu_count(), 16),
+        "max_default_jobs": 16,
         "optimization_level": "O2",
         "toolchain": "C:/vcpkg/scripts/buildsystems/vcpkg.cmake"
     },
     "linux": {
         "generator": "Ninja",
         "compiler": "gcc",
-        "parallel_jobs": min(multiprocessing.cpu_count(), 16),
+        "max_default_jobs": 16,
         "optimization_level": "O3",
         "toolchain": ""
     },
     "darwin": {
         "generator": "Ninja",
         "compiler": "clang",
-        "parallel_jobs": min(multiprocessing.cpu_count(), 8),
+        "max_default_jobs": 8,
         "optimization_level": "O2",
         "toolchain": ""
     }
 }
 
+# Visual Studio install roots and editions, in order of preference
+VS_ROOTS = [
+    r"C:\Program Files\Microsoft Visual Studio\2022",
+    r"C:\Program Files\Microsoft Visual Studio\2019",
+    r"C:\Program Files (x86)\Microsoft Visual Studio\2019"
+]
+VS_EDITIONS = ["Community", "Professional", "Enterprise", "BuildTools"]
+VCVARS_GLOB = "*/VC/Auxiliary/Build/vcvarsall.bat"
+
+# Generated files whose content never changes between runs
+_AUTO_MAKE_BAT_TMPL = """@echo off
+echo Running Drogon Auto Build System
+python {manager} build
+if %ERRORLEVEL% NEQ 0 (
+    echo Build failed!
+    exit /b %ERRORLEVEL%
+)
+"""
+
+_MAKEFILE_TMPL = """# Auto-generated Makefile for Drogon
+
+.PHONY: all clean
+
+all:
+\tpython3 {manager} build
+
+clean:
+\tpython3 {manager} clean
+"""
+
+_VSCODE_TASKS_JSON = json.dumps({
+    "version": "2.0.0",
+    "tasks": [
+        {
+            "label": "Auto-Build Drogon (Intelligent)",
+            "type": "shell",
+            "command": "python",
+            "args": [
+                "${workspaceFolder}/scripts/auto_build_manager.py",
+                "build"
+            ],
+            "group": {
+                "kind": "build",
+                "isDefault": True
+            },
+            "problemMatcher": ["$gcc", "$msCompile"],
+            "presentation": {
+                "reveal": "always",
+                "panel": "shared"
+            },
+            "runOptions": {
+                "runOn": "folderOpen"
+            }
+        },
+        {
+            "label": "Clean Drogon Build",
+            "type": "shell",
+            "command": "python",
+            "args": [
+                "${workspaceFolder}/scripts/auto_build_manager.py",
+                "clean"
+            ],
+            "problemMatcher": []
+        }
+    ]
+}, indent=2)
+
+def _dumps_compact(obj):
+    """Serialize obj as compact single-line JSON (history records)"""
+    if _HAS_ORJSON:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+def _edition_rank(edition):
+    """Sort key that puts preferred Visual Studio editions first"""
+    return VS_EDITIONS.index(edition) if edition in VS_EDITIONS else len(VS_EDITIONS)
+
+@lru_cache(maxsize=None)
+def _available_cpus():
+    """Number of CPUs this process may run on (respects cpusets/affinity)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def default_configs(system):
+    """Return a fresh default configuration for the given platform"""
+    config = dict(_DEFAULT_CONFIGS[system])
+    config["parallel_jobs"] = min(_available_cpus(), config.pop("max_default_jobs"))
+    return config
+
 class BuildManager:
-    def __init__(self, workspace_root):
+    # Commands that never invoke a compiler, so they can skip environment detection
+    NO_ENV_COMMANDS = frozenset({"clean", "setup-vscode", "generate-makefile"})
+    
+    def __init__(self, workspace_root, refresh_env=False, detect_env=True):
         self.workspace_root = Path(workspace_root)
         self.build_dir = self.workspace_root / "build"
         self.scripts_dir = self.workspace_root / "scripts"
         self.history_file = self.scripts_dir / BUILD_HISTORY_FILE
         self.optimization_file = self.scripts_dir / OPTIMIZATION_FILE
+        self.vcvars_env_file = self.scripts_dir / VCVARS_ENV_FILE
+        self.cmd_cache_file = self.scripts_dir / CMD_CACHE_FILE
         self.system = platform.system().lower()
+        self.refresh_env = refresh_env
+        self._vcvars_env = None
         
         # Ensure directories exist
         self.build_dir.mkdir(exist_ok=True)
         self.scripts_dir.mkdir(exist_ok=True)
         
-        # Load build history and optimizations
-        self.build_history = self._load_json(self.history_file, [])
-        self.optimizations = self._load_json(self.optimization_file, DEFAULT_CONFIGS)
+        # Load optimizations and any builds not yet analyzed
+        self.optimizations = self._load_json(self.optimization_file, {})
+        self._pending_durations = self._unanalyzed_build_durations()
+        self._cmd_cache = self._load_json(self.cmd_cache_file, {})
+        
+        # History records are buffered and written out in one go
+        self._history_pending = []
+        atexit.register(self._flush_history)
         
         # Detect environment
-        self._detect_environment()
+        if detect_env:
+            self._detect_environment()
+        else:
+            self.config = self.optimizations.get(self.system) or default_configs(self.system)
         
     def _load_json(self, file_path, default_value):
         """Load JSON file or return default if file doesn't exist"""
@@ -75,55 +209,173 @@ class BuildManager:
         return default_value
         
     def _save_json(self, file_path, data):
-        """Save data to JSON file"""
-        with open(file_path, 'w') as f:
+        """Save data to JSON file atomically"""
+        with self._atomic_writer(file_path, 'w') as f:
             json.dump(data, f, indent=2)
     
+    @staticmethod
+    @contextlib.contextmanager
+    def _atomic_writer(file_path, mode):
+        """Write to a uniquely named temp file next to file_path, then swap it in"""
+        # A per-writer temp name keeps concurrent builds from replacing each other's half-written file
+        f = tempfile.NamedTemporaryFile(mode, dir=file_path.parent, prefix=file_path.name + ".", suffix=".tmp", delete=False)
+        try:
+            with f:
+                yield f
+            os.replace(f.name, file_path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(f.name)
+            raise
+    
+    def _recent_history(self, n=HISTORY_TAIL):
+        """Return the last n records of the JSON Lines history file"""
+        try:
+            with open(self.history_file, 'r') as f:
+                lines = deque(f, maxlen=n)
+            return [json.loads(line) for line in lines if line.strip()]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Warning: Failed to load {self.history_file}: {e}")
+        return []
+    
+    def _unanalyzed_build_durations(self):
+        """Durations of successful builds recorded since the last optimization pass"""
+        durations = []
+        for record in reversed(self._recent_history()):
+            if record.get("type") != "build" or not record.get("success"):
+                continue
+            if record.get("analyzed"):
+                break
+            durations.append(record["duration"])
+        durations.reverse()
+        return durations
+    
+    def _append_history(self, record):
+        """Queue a record for the history file; written by _flush_history"""
+        self._history_pending.append(record)
+    
+    def _flush_history(self):
+        """Append all pending records to the history file (one JSON object per line)"""
+        if not self._history_pending:
+            return
+        pending, self._history_pending = self._history_pending, []
+        lines = [_dumps_compact(record) + '\n' for record in pending]
+        with open(self.history_file, 'a') as f:
+            f.write("".join(lines))
+        self._maybe_compact_history(min(len(line) for line in lines))
+    
+    def _maybe_compact_history(self, record_bytes, max_records=HISTORY_MAX_RECORDS):
+        """Rotate old records into a gzip archive once the history file gets large"""
+        # Only read the file once its size suggests it may be over the limit; records
+        # of similar shape are assumed to be at least half the size of the ones just written
+        if self.history_file.stat().st_size <= max_records * 2 * max(record_bytes // 2, 1):
+            return
+        with open(self.history_file, 'rb') as f:
+            lines = f.readlines()
+        if len(lines) <= max_records * 2:
+            return
+        
+        # Archive everything but the most recent records, then swap in the trimmed file
+        epoch = time.time_ns()
+        archive = self.history_file.with_name(f"{self.history_file.stem}.{epoch}.jsonl.gz")
+        with gzip.open(archive, 'wb', compresslevel=1) as f:
+            f.writelines(lines[:-max_records])
+        with self._atomic_writer(self.history_file, 'wb') as f:
+            f.writelines(lines[-max_records:])
+    
     def _detect_environment(self):
         """Detect build environment and available tools"""
-        self.config = self.optimizations.get(self.system, DEFAULT_CONFIGS[self.system])
+        self.config = self.optimizations.get(self.system) or default_configs(self.system)
         
-        # Detect compilers
-        if self.system == "windows":
-            self._detect_windows_environment()
-        elif self.system == "linux":
-            self._detect_linux_environment()
-        elif self.system == "darwin":
-            self._detect_macos_environment()
+        # Reuse previous probe results if PATH and platform are unchanged
+        env_key = self._environment_key()
+        env_cache = self.config.get("_env_cache", {})
+        if not self.refresh_env and env_cache.get("key") == env_key:
+            self.config.update({k: v for k, v in env_cache.items() if k != "key"})
+        else:
+            # Detect compilers
+            if self.system == "windows":
+                self._detect_windows_environment()
+            elif self.system == "linux":
+                self._detect_linux_environment()
+            elif self.system == "darwin":
+                self._detect_macos_environment()
+            
+            env_cache = {k: self.config[k] for k in ENV_CACHE_KEYS if k in self.config}
+            env_cache["key"] = env_key
+            self.config["_env_cache"] = env_cache
+            
+            # Persist right away so later runs (including clean) skip the probes
+            self.optimizations[self.system] = self.config
+            self._save_json(self.optimization_file, self.optimizations)
     
-    def _detect_windows_environment(self):
-        """Detect Visual Studio and other tools on Windows"""
-        # Try to find VS installation path
-        vs_paths = [
-            os.environ.get("VS_PATH", ""),
-            r"C:\Program Files\Microsoft Visual Studio\2022",
-            r"C:\Program Files\Microsoft Visual Studio\2019",
-            r"C:\Program Files (x86)\Microsoft Visual Studio\2019"
-        ]
-        
-        editions = ["Community", "Professional", "Enterprise", "BuildTools"]
-        
-        for vs_path in vs_paths:
-            if not vs_path or not os.path.exists(vs_path):
+    def _environment_key(self):
+        """Hash of the inputs that determine which tools environment detection finds"""
+        raw = os.environ.get("PATH", "") + platform.platform()
+        return hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()
+    
+    @staticmethod
+    def _which(name):
+        """Locate a tool on PATH without spawning it"""
+        return shutil.which(name)
+    
+    @staticmethod
+    def _tool_version(name):
+        """Return the first line of `<name> --version`, or an empty string"""
+        try:
+            output = subprocess.run(
+                [name, "--version"],
+                stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                text=True, check=False
+            ).stdout
+            return output.split("\n")[0] if output else ""
+        except (subprocess.SubprocessError, FileNotFoundError):
+            return ""
+    
+    def _probe(self, name):
+        """Return (found, version line) for a tool; the version is only queried with record_versions"""
+        if not self._which(name):
+            return False, ""
+        return True, self._tool_version(name) if self.config.get("record_versions", False) else ""
+    
+    def _probe_all(self, names):
+        """Probe several tools, concurrently only when their --version has to be run"""
+        if not self.config.get("record_versions", False):
+            return {name: self._probe(name) for name in names}
+        with ThreadPoolExecutor(max_workers=len(names)) as executor:
+            futures = {name: executor.submit(self._probe, name) for name in names}
+        return {name: future.result() for name, future in futures.items()}
+    
+    @staticmethod
+    def _find_visual_studio():
+        """Locate vcvarsall.bat, returning the matching config entries"""
+        # Try to find VS installation path, one directory listing per root
+        for vs_path in [os.environ.get("VS_PATH", "")] + VS_ROOTS:
+            if not vs_path:
                 continue
             
-            for edition in editions:
-                vcvars_path = os.path.join(vs_path, edition, "VC", "Auxiliary", "Build", "vcvarsall.bat")
-                if os.path.exists(vcvars_path):
-                    self.config["vs_path"] = vs_path
-                    self.config["vcvars_path"] = vcvars_path
-                    self.config["vs_edition"] = edition
-                    break
-            
-            if "vs_path" in self.config:
-                break
+            hits = sorted(Path(vs_path).glob(VCVARS_GLOB), key=lambda hit: _edition_rank(hit.parents[3].name))
+            if hits:
+                return {"vs_path": vs_path, "vcvars_path": str(hits[0]), "vs_edition": hits[0].parents[3].name}
+        return {}
+    
+    def _detect_windows_environment(self):
+        """Detect Visual Studio and other tools on Windows"""
+        if self.config.get("record_versions", False):
+            # Scan for Visual Studio while `ninja --version` runs
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                vs_future = executor.submit(self._find_visual_studio)
+                ninja_future = executor.submit(self._probe, "ninja")
+            vs_config, ninja_probe = vs_future.result(), ninja_future.result()
+        else:
+            vs_config, ninja_probe = self._find_visual_studio(), self._probe("ninja")
+        self.config.update(vs_config)
         
         # Check if Ninja exists
-        try:
-            subprocess.run(["ninja", "--version"], stdout=subprocess.PIPE, check=True)
-            self.config["has_ninja"] = True
-        except (subprocess.SubprocessError, FileNotFoundError):
-            self.config["has_ninja"] = False
+        self.config["has_ninja"] = ninja_probe[0]
+        if not self.config["has_ninja"]:
             # Fall back to Visual Studio generator if Ninja is not available
             if "vs_path" in self.config:
                 vs_year = "2022" if "2022" in self.config["vs_path"] else "2019"
@@ -131,53 +383,58 @@ class BuildManager:
     
     def _detect_linux_environment(self):
         """Detect compilers and tools on Linux"""
+        probes = self._probe_all(("gcc", "clang", "ninja"))
+        
         # Check for GCC and Clang
-        try:
-            gcc_version = subprocess.run(["gcc", "--version"], stdout=subprocess.PIPE, text=True, check=False).stdout
-            self.config["gcc_version"] = gcc_version.split("\n")[0] if gcc_version else ""
-            self.config["has_gcc"] = bool(self.config["gcc_version"])
-        except (subprocess.SubprocessError, FileNotFoundError):
-            self.config["has_gcc"] = False
-            
-        try:
-            clang_version = subprocess.run(["clang", "--version"], stdout=subprocess.PIPE, text=True, check=False).stdout
-            self.config["clang_version"] = clang_version.split("\n")[0] if clang_version else ""
-            self.config["has_clang"] = bool(self.config["clang_version"])
-        except (subprocess.SubprocessError, FileNotFoundError):
-            self.config["has_clang"] = False
+        self.config["has_gcc"], gcc_version = probes["gcc"]
+        self.config["has_clang"], clang_version = probes["clang"]
+        if gcc_version:
+            self.config["gcc_version"] = gcc_version
+        if clang_version:
+            self.config["clang_version"] = clang_version
         
         # Set compiler preference
         if not self.config["has_gcc"] and self.config["has_clang"]:
             self.config["compiler"] = "clang"
         
         # Check for Ninja
-        try:
-            subprocess.run(["ninja", "--version"], stdout=subprocess.PIPE, check=True)
-            self.config["has_ninja"] = True
-        except (subprocess.SubprocessError, FileNotFoundError):
-            self.config["has_ninja"] = False
+        self.config["has_ninja"] = probes["ninja"][0]
+        if not self.config["has_ninja"]:
             self.config["generator"] = "Unix Makefiles"
     
     def _detect_macos_environment(self):
         """Detect compilers and tools on macOS"""
+        probes = self._probe_all(("clang", "ninja"))
+        
         # macOS typically uses Clang
-        try:
-            clang_version = subprocess.run(["clang", "--version"], stdout=subprocess.PIPE, text=True, check=False).stdout
-            self.config["clang_version"] = clang_version.split("\n")[0] if clang_version else ""
-            self.config["has_clang"] = bool(self.config["clang_version"])
-        except (subprocess.SubprocessError, FileNotFoundError):
-            self.config["has_clang"] = False
+        self.config["has_clang"], clang_version = probes["clang"]
+        if clang_version:
+            self.config["clang_version"] = clang_version
         
         # Check for Ninja
-        try:
-            subprocess.run(["ninja", "--version"], stdout=subprocess.PIPE, check=True)
-            self.config["has_ninja"] = True
-        except (subprocess.SubprocessError, FileNotFoundError):
-            self.config["has_ninja"] = False
+        self.config["has_ninja"] = probes["ninja"][0]
+        if not self.config["has_ninja"]:
             self.config["generator"] = "Unix Makefiles"
     
+    def _command_key(self, kind):
+        """Hash of everything a generated command depends on"""
+        # Underscore-prefixed entries are bookkeeping (caches, stats) and never affect commands
+        settings = {k: v for k, v in self.config.items() if not k.startswith("_")}
+        raw = json.dumps([kind, self.system, str(self.workspace_root), settings], sort_keys=True, default=str)
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+    
+    def _cache_command(self, key, args):
+        """Remember a generated command for this and later runs"""
+        self._cmd_cache[key] = args
+        self._save_json(self.cmd_cache_file, self._cmd_cache)
+        return list(args)
+    
     def generate_cmake_config(self):
         """Generate CMake configuration command based on environment and history"""
+        cmd_key = self._command_key("configure")
+        if cmd_key in self._cmd_cache:
+            return list(self._cmd_cache[cmd_key])
+        
         cmake_args = ["cmake"]
         
         # Add source directory
@@ -212,49 +469,114 @@ class BuildManager:
         if "cmake_extra_args" in self.config:
             cmake_args.extend(self.config["cmake_extra_args"])
         
-        return cmake_args
+        return self._cache_command(cmd_key, cmake_args)
     
     def generate_build_command(self):
         """Generate build command based on environment and history"""
+        cmd_key = self._command_key("build")
+        if cmd_key in self._cmd_cache:
+            return list(self._cmd_cache[cmd_key])
+        
         build_args = ["cmake", "--build", str(self.build_dir)]
         
         # Add parallel jobs
-        jobs = self.config.get("parallel_jobs", multiprocessing.cpu_count())
+        jobs = self.config.get("parallel_jobs", _available_cpus())
         build_args.extend(["--parallel", str(jobs)])
         
         # Add build type for multi-config generators (Visual Studio)
         if self.system == "windows" and not self.config.get("generator", "").startswith("Ninja"):
             build_args.extend(["--config", "Release"])
         
-        return build_args
+        return self._cache_command(cmd_key, build_args)
+    
+    def _get_vcvars_env(self):
+        """Return the current environment with the vcvarsall.bat changes applied, evaluating it at most once"""
+        if self._vcvars_env is not None:
+            return self._vcvars_env
+        
+        vcvars_path = self.config["vcvars_path"]
+        try:
+            mtime = os.path.getmtime(vcvars_path)
+        except OSError:
+            mtime = ""
+        path_hash = hashlib.blake2b(os.environ.get("PATH", "").encode(), digest_size=8).hexdigest()
+        cache_key = f"{vcvars_path}:{mtime}:{path_hash}"
+        
+        # Reuse the changes captured by a previous run if vcvarsall.bat and PATH are unchanged
+        cached = {} if self.refresh_env else self._load_json(self.vcvars_env_file, {})
+        if cached.get("key") == cache_key and cached.get("delta"):
+            delta = cached["delta"]
+        else:
+            delta = self._capture_vcvars_delta(vcvars_path)
+            if delta:
+                self._save_json(self.vcvars_env_file, {"key": cache_key, "delta": delta})
+        
+        self._vcvars_env = dict(os.environ)
+        self._vcvars_env.update(delta)
+        return self._vcvars_env
+    
+    @staticmethod
+    def _capture_vcvars_delta(vcvars_path):
+        """Return only the variables vcvarsall.bat adds or changes relative to os.environ"""
+        result = subprocess.run(
+            f'cmd /s /c ""{vcvars_path}" x64 && set"',
+            stdout=subprocess.PIPE, text=True, check=False
+        )
+        # Windows variable names are case-insensitive and os.environ keeps them upper-cased
+        delta = {}
+        for line in result.stdout.splitlines():
+            key, sep, value = line.partition("=")
+            if sep and key:
+                key = key.upper()
+                if os.environ.get(key) != value:
+                    delta[key] = value
+        
+        if result.returncode != 0 or not delta:
+            print(f"Warning: Failed to capture environment from {vcvars_path}")
+            return {}
+        return delta
     
     def _run_windows_with_vcvars(self, cmd):
         """Run command with Visual Studio environment on Windows"""
         if "vcvars_path" not in self.config:
             return subprocess.run(cmd, check=False)
         
-        # Create a batch file to set up environment and run command
-        temp_batch = self.build_dir / "temp_build_cmd.bat"
-        with open(temp_batch, "w") as f:
-            f.write(f"@echo off\n")
-            f.write(f"call \"{self.config['vcvars_path']}\" x64\n")
-            f.write(" ".join(cmd) + "\n")
-        
-        result = subprocess.run([temp_batch], check=False)
-        
-        # Clean up temp file
+        env = self._get_vcvars_env()
+        # Resolve the executable against the Visual Studio PATH, not our own
+        executable = shutil.which(cmd[0], path=env.get("PATH")) or cmd[0]
+        return subprocess.run([executable] + cmd[1:], env=env, check=False)
+    
+    def _configure_args_hash(self):
+        """Hash of the CMake configure command line"""
+        return hashlib.blake2b(" ".join(self.generate_cmake_config()).encode(), digest_size=16).hexdigest()
+    
+    def _configure_stale(self):
+        """Check whether CMake needs to be re-run before building"""
+        cache_file = self.build_dir / "CMakeCache.txt"
+        hash_file = self.build_dir / CONFIGURE_HASH_FILE
         try:
-            os.remove(temp_batch)
-        except:
-            pass
-            
-        return result
+            cache_mtime = cache_file.stat().st_mtime
+            if hash_file.read_text().strip() != self._configure_args_hash():
+                return True
+        except OSError:
+            return True
+        
+        # Any CMakeLists.txt edited since the last configure invalidates it
+        for root, dirs, files in os.walk(self.workspace_root):
+            dirs[:] = [d for d in dirs if not d.startswith(".") and Path(root, d) != self.build_dir]
+            if "CMakeLists.txt" in files and os.path.getmtime(os.path.join(root, "CMakeLists.txt")) > cache_mtime:
+                return True
+        return False
     
     def configure(self):
         """Run CMake configuration"""
         cmake_cmd = self.generate_cmake_config()
         print(f"Running CMake configuration: {' '.join(cmake_cmd)}")
         
+        # Only a successful configure leaves a hash behind, even if a failed run rewrites CMakeCache.txt
+        hash_file = self.build_dir / CONFIGURE_HASH_FILE
+        hash_file.unlink(missing_ok=True)
+        
         start_time = time.time()
         
         # Run CMake configure command
@@ -267,8 +589,8 @@ class BuildManager:
         success = result.returncode == 0
         
         # Record configure stats
-        self.build_history.append({
-            "timestamp": datetime.now().isoformat(),
+        self._append_history({
+            "ts_ns": time.time_ns(),
             "type": "configure",
             "command": " ".join(cmake_cmd),
             "success": success,
@@ -276,7 +598,8 @@ class BuildManager:
             "returncode": result.returncode
         })
         
-        self._save_json(self.history_file, self.build_history)
+        if success:
+            hash_file.write_text(self._configure_args_hash())
         return success
     
     def build(self):
@@ -295,48 +618,90 @@ class BuildManager:
         end_time = time.time()
         success = result.returncode == 0
         
-        # Record build stats
-        self.build_history.append({
-            "timestamp": datetime.now().isoformat(),
+        duration = end_time - start_time
+        
+        # Only re-analyze once a full batch of successful builds has accumulated
+        if success:
+            self._pending_durations.append(duration)
+        analyze = success and len(self._pending_durations) >= ANALYZE_BATCH
+        
+        record = {
+            "ts_ns": time.time_ns(),
             "type": "build",
             "command": " ".join(build_cmd),
             "success": success,
-            "duration": end_time - start_time,
-            "returncode": result.returncode
-        })
+            "duration": duration,
+            "returncode": result.returncode,
+            "analyzed": analyze
+        }
         
-        self._save_json(self.history_file, self.build_history)
+        # If a batch is complete, analyze builds for optimizations and log the decision
+        if analyze:
+            record["tuning"] = self._analyze_and_optimize()
         
-        # If successful, analyze build for optimizations
-        if success:
-            self._analyze_and_optimize()
+        # Record build stats
+        self._append_history(record)
+        self._flush_history()
         
         return success
     
     def _analyze_and_optimize(self):
-        """Analyze build history and optimize future builds"""
-        # This is a simple implementation that could be expanded with more sophisticated analysis
-        successful_builds = [b for b in self.build_history[-10:] if b["type"] == "build" and b["success"]]
-        if not successful_builds:
-            return
-        
-        # Calculate average build time
-        avg_build_time = sum(b["duration"] for b in successful_builds) / len(successful_builds)
+        """Analyze build history and optimize future builds
         
-        # Adjust parallel jobs based on build time trend
-        if len(successful_builds) >= 3:
+        Returns a dict describing the tuning decision, for the history record.
+        """
+        # This is a simple implementation that could be expanded with more sophisticated analysis
+        durations, self._pending_durations = self._pending_durations, []
+        if not durations:
+            return None
+        
+        stats = self.config.setdefault("_build_stats", {"ema_duration": 0.0, "ema_variance": 0.0, "alpha": 0.2, "count": 0})
+        stats.setdefault("ema_variance", 0.0)
+        mean = stats["ema_duration"]
+        std = math.sqrt(stats["ema_variance"])
+        
+        # Judge the new builds against the band established by earlier builds, so that
+        # ordinary build-time noise does not flip parallel_jobs back and forth
+        previous_jobs = self.config["parallel_jobs"]
+        weight = 2 * self.config.get("stability_plasticity", DEFAULT_STABILITY_PLASTICITY)
+        band = weight * max(0.15 * mean, std)
+        decision = {"decision": "keep", "reason": "not enough builds yet"}
+        if stats["count"] >= 3:
+            recent = durations[-2:]
             # Check if builds are getting faster
-            if successful_builds[-1]["duration"] < avg_build_time * 0.9:
+            if recent[-1] < mean - band:
                 # Increase parallelism slightly
-                self.config["parallel_jobs"] = min(self.config["parallel_jobs"] + 1, multiprocessing.cpu_count() * 2)
-            # Check if builds are getting slower
-            elif successful_builds[-1]["duration"] > avg_build_time * 1.1 and self.config["parallel_jobs"] > 1:
+                self.config["parallel_jobs"] = min(previous_jobs + 1, _available_cpus() * 2)
+                decision = {"decision": "increase", "reason": f"{recent[-1]:.2f}s below {mean - band:.2f}s"}
+            # Check if builds are consistently getting slower
+            elif len(recent) == 2 and min(recent) > mean + band and previous_jobs > 1:
                 # Decrease parallelism slightly
-                self.config["parallel_jobs"] = max(self.config["parallel_jobs"] - 1, 1)
+                self.config["parallel_jobs"] = max(previous_jobs - 1, 1)
+                decision = {"decision": "decrease", "reason": f"last two builds above {mean + band:.2f}s"}
+            else:
+                decision = {"decision": "keep", "reason": f"within {mean:.2f}s +/- {band:.2f}s"}
+        decision["parallel_jobs"] = self.config["parallel_jobs"]
+        
+        # Fold the new builds into the running mean and variance of build time
+        alpha = stats["alpha"]
+        for duration in durations:
+            if stats["count"] == 0:
+                stats["ema_duration"], stats["ema_variance"] = duration, 0.0
+            else:
+                diff = duration - stats["ema_duration"]
+                stats["ema_duration"] += alpha * diff
+                stats["ema_variance"] = (1 - alpha) * (stats["ema_variance"] + alpha * diff * diff)
+            stats["count"] += 1
+        
+        # Cached build commands still carry the old job count
+        if self.config["parallel_jobs"] != previous_jobs:
+            self._cmd_cache.clear()
+            self._save_json(self.cmd_cache_file, self._cmd_cache)
         
         # Save optimizations
         self.optimizations[self.system] = self.config
         self._save_json(self.optimization_file, self.optimizations)
+        return decision
     
     def clean(self):
         """Clean the build directory"""
@@ -350,49 +715,25 @@ class BuildManager:
                 else:
                     subprocess.run(clean_cmd, check=False)
             else:
-                # Otherwise remove build dir contents but keep the directory
-                for item in self.build_dir.iterdir():
-                    if item.is_file():
-                        item.unlink()
-                    elif item.is_dir():
-                        shutil.rmtree(item)
+                # Otherwise remove the whole build dir and recreate it empty
+                shutil.rmtree(self.build_dir, ignore_errors=True)
+                self.build_dir.mkdir(parents=True, exist_ok=True)
     
     def generate_makefile(self):
         """Generate a platform-specific build script that will be auto-executed"""
+        manager_script = self.scripts_dir / 'auto_build_manager.py'
         if self.system == "windows":
             makefile_path = self.workspace_root / "auto_make.bat"
-            with open(makefile_path, "w") as f:
-                f.write("@echo off\n")
-                f.write("echo Running Drogon Auto Build System\n")
-                f.write(f"python {self.scripts_dir / 'auto_build_manager.py'} build\n")
-                f.write("if %ERRORLEVEL% NEQ 0 (\n")
-                f.write("    echo Build failed!\n")
-                f.write("    exit /b %ERRORLEVEL%\n")
-                f.write(")\n")
-            
-            # Make executable
-            try:
-                os.chmod(makefile_path, 0o755)
-            except:
-                pass
+            makefile_path.write_text(_AUTO_MAKE_BAT_TMPL.format(manager=manager_script))
         else:
             makefile_path = self.workspace_root / "Makefile"
-            with open(makefile_path, "w") as f:
-                f.write("# Auto-generated Makefile for Drogon\n")
-                f.write("\n")
-                f.write(".PHONY: all clean\n")
-                f.write("\n")
-                f.write("all:\n")
-                f.write(f"\tpython3 {self.scripts_dir / 'auto_build_manager.py'} build\n")
-                f.write("\n")
-                f.write("clean:\n")
-                f.write(f"\tpython3 {self.scripts_dir / 'auto_build_manager.py'} clean\n")
-            
-            # Make executable
-            try:
-                os.chmod(makefile_path, 0o755)
-            except:
-                pass
+            makefile_path.write_text(_MAKEFILE_TMPL.format(manager=manager_script))
+        
+        # Make executable
+        try:
+            os.chmod(makefile_path, 0o755)
+        except:
+            pass
         
         print(f"Generated build script at {makefile_path}")
     
@@ -402,81 +743,51 @@ class BuildManager:
         vscode_dir.mkdir(exist_ok=True)
         
         # Create tasks.json with build tasks
-        tasks_file = vscode_dir / "tasks.json"
-        tasks = {
-            "version": "2.0.0",
-            "tasks": [
-                {
-                    "label": "Auto-Build Drogon (Intelligent)",
-                    "type": "shell",
-                    "command": "python",
-                    "args": [
-                        "${workspaceFolder}/scripts/auto_build_manager.py",
-                        "build"
-                    ],
-                    "group": {
-                        "kind": "build",
-                        "isDefault": True
-                    },
-                    "problemMatcher": ["$gcc", "$msCompile"],
-                    "presentation": {
-                        "reveal": "always",
-                        "panel": "shared"
-                    },
-                    "runOptions": {
-                        "runOn": "folderOpen"
-                    }
-                },
-                {
-                    "label": "Clean Drogon Build",
-                    "type": "shell",
-                    "command": "python",
-                    "args": [
-                        "${workspaceFolder}/scripts/auto_build_manager.py",
-                        "clean"
-                    ],
-                    "problemMatcher": []
-                }
-            ]
-        }
-        
-        with open(tasks_file, "w") as f:
-            json.dump(tasks, f, indent=2)
+        (vscode_dir / "tasks.json").write_text(_VSCODE_TASKS_JSON)
+    
+    def configure_and_build(self):
+        """Configure first if anything CMake depends on changed, then build"""
+        if self._configure_stale() and not self.configure():
+            return False
+        return self.build()
+    
+    _COMMANDS = {
+        "configure": configure,
+        "build": configure_and_build,
+        "clean": clean,
+        "generate-makefile": generate_makefile,
+        "setup-vscode": generate_vscode_integration
+    }
     
     def run_command(self, cmd):
         """Run a specific command"""
-        if cmd == "configure":
-            return self.configure()
-        elif cmd == "build":
-            # Configure first, then build
-            if not self.configure():
-                return False
-            return self.build()
-        elif cmd == "clean":
-            self.clean()
-            return True
-        elif cmd == "generate-makefile":
-            self.generate_makefile()
-            return True
-        elif cmd == "setup-vscode":
-            self.generate_vscode_integration()
-            return True
-        else:
+        fn = self._COMMANDS.get(cmd)
+        if fn is None:
             print(f"Unknown command: {cmd}")
             return False
+        # Commands without a meaningful result (clean, generators) count as success
+        result = fn(self)
+        return True if result is None else result
 
 def main():
     workspace_root = os.environ.get("DROGON_WORKSPACE_ROOT")
     if not workspace_root:
         workspace_root = Path(__file__).resolve().parent.parent
     
-    manager = BuildManager(workspace_root)
+    args = sys.argv[1:]
+    refresh_env = "--refresh-env" in args
+    args = [a for a in args if a != "--refresh-env"]
     
-    if len(sys.argv) < 2:
-        print("Usage: python auto_build_manager.py [configure|build|clean|generate-makefile|setup-vscode]")
+    if not args:
+        print(f"Usage: python auto_build_manager.py [--refresh-env] [{'|'.join(BuildManager._COMMANDS)}]")
         return 1
     
-    cmd = sys.argv[1]
+    cmd = args[0]
+    manager = BuildManager(
+        workspace_root,
+        refresh_env=refresh_env,
+        detect_env=cmd not in BuildManager.NO_ENV_COMMANDS
+    )
     success = manager.run_command(cmd)
     
     return 0 if success else 1
@@ -6,14 +6,28 @@ This script verifies that all dependencies are correctly installed and available
 It also checks that the build environment is properly configured.
 """
 
+import io
 import os
+import re
 import sys
+import argparse
+import contextlib
 import platform
 import subprocess
 import shutil
 import json
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
 # Required dependencies for all platforms
 COMMON_REQUIRED = {
     "cmake": {
@@ -96,34 +110,87 @@ REQUIRED_LIBRARIES = {
     ]
 }
 
+# Host platform, resolved once ("windows", "linux", "darwin", ...)
+_SYSTEM = platform.system().lower()
+
+# Environment variable (and its separator) searched for shared libraries on each platform
+_PATH_VAR = {
+    "windows": ("PATH", ";"),
+    "darwin": ("DYLD_LIBRARY_PATH", ":"),
+    "linux": ("LD_LIBRARY_PATH", ":")
+}
+
+# Packages probed by the CMake test project, as named in its status messages
+CMAKE_TEST_PACKAGES = ["OpenSSL", "ZLIB", "jsoncpp", "UUID"]
+
+_CMAKE_TEST_LISTS = """
+cmake_minimum_required(VERSION 3.5)
+project(DrogonDependencyTest)
+
+# Find required packages
+find_package(OpenSSL)
+find_package(ZLIB)
+find_package(jsoncpp)
+find_package(UUID)
+
+# Configure a header to pass information to C++ code
+configure_file(
+    "${CMAKE_CURRENT_SOURCE_DIR}/config.h.in"
+    "${CMAKE_CURRENT_BINARY_DIR}/config.h"
+)
+
+# Create dummy output showing what was found
+message(STATUS "OpenSSL found: ${OPENSSL_FOUND}")
+message(STATUS "ZLIB found: ${ZLIB_FOUND}")
+message(STATUS "jsoncpp found: ${jsoncpp_FOUND}")
+message(STATUS "UUID found: ${UUID_FOUND}")
+"""
+
+_CMAKE_TEST_CONFIG_H = """
+#define OPENSSL_FOUND @OPENSSL_FOUND@
+#define ZLIB_FOUND @ZLIB_FOUND@
+#define JSONCPP_FOUND @jsoncpp_FOUND@
+#define UUID_FOUND @UUID_FOUND@
+"""
+
+# First version-like token (e.g. 3.25 or 3.25.1) in a tool's output
+_VERSION_RE = re.compile(r'(\d+\.\d+(?:\.\d+)?)')
+
 # Colors for terminal output
+_RESET = "\033[0m"
 COLORS = {
-    "RESET": "\033[0m",
-    "RED": "\033[91m",
-    "GREEN": "\033[92m",
-    "YELLOW": "\033[93m",
-    "BLUE": "\033[94m",
-    "MAGENTA": "\033[95m",
-    "CYAN": "\033[96m",
-    "BOLD": "\033[1m"
+    "RESET": (_RESET, _RESET),
+    "RED": ("\033[91m", _RESET),
+    "GREEN": ("\033[92m", _RESET),
+    "YELLOW": ("\033[93m", _RESET),
+    "BLUE": ("\033[94m", _RESET),
+    "MAGENTA": ("\033[95m", _RESET),
+    "CYAN": ("\033[96m", _RESET),
+    "BOLD": ("\033[1m", _RESET)
 }
 
 # Disable colors on Windows unless running in a terminal that supports them
-if platform.system() == "Windows" and not os.environ.get("TERM"):
+if _SYSTEM == "windows" and not os.environ.get("TERM"):
     for key in COLORS:
-        COLORS[key] = ""
+        COLORS[key] = ("", "")
 
 
 def colored(text, color):
     """Return colored text if supported by the terminal"""
-    return f"{COLORS[color]}{text}{COLORS['RESET']}"
+    prefix, suffix = COLORS[color]
+    return prefix + text + suffix
 
 
 def print_header(text):
     """Print a header with formatting"""
-    print(f"\n{colored('┌─' + '─' * len(text) + '─┐', 'CYAN')}")
-    print(f"{colored('│ ', 'CYAN')}{colored(text, 'BOLD')}{colored(' │', 'CYAN')}")
-    print(f"{colored('└─' + '─' * len(text) + '─┘', 'CYAN')}")
+    cyan, reset = COLORS["CYAN"]
+    bold, bold_reset = COLORS["BOLD"]
+    rule = "─" * (len(text) + 2)
+    sys.stdout.write(
+        f"\n{cyan}┌{rule}┐{reset}\n"
+        f"{cyan}│ {reset}{bold}{text}{bold_reset}{cyan} │{reset}\n"
+        f"{cyan}└{rule}┘{reset}\n"
+    )
 
 
 def print_result(name, status, message=""):
@@ -141,24 +208,30 @@ def print_result(name, status, message=""):
         print(f"  {name:.<25} {status_colored}")
 
 
+@lru_cache(maxsize=None)
+def resolve_command(command):
+    """Return the full path of a command on PATH, or None (cached per run)"""
+    return shutil.which(command)
+
+
 def check_command_exists(command):
     """Check if a command exists on the system"""
-    return shutil.which(command) is not None
+    return resolve_command(command) is not None
 
 
+@lru_cache(maxsize=256)
 def parse_version(version_str):
     """Parse version string into components"""
     # Extract the first version-like string from the text
-    import re
-    version_match = re.search(r'(\d+\.\d+(\.\d+)?)', version_str)
+    version_match = _VERSION_RE.search(version_str)
     if version_match:
         version = version_match.group(1)
         components = version.split('.')
         # Pad with zeros if needed
         while len(components) < 3:
             components.append('0')
-        return [int(c) for c in components]
-    return [0, 0, 0]
+        return tuple(int(c) for c in components)
+    return (0, 0, 0)
 
 
 def compare_versions(version1, version2):
@@ -171,78 +244,88 @@ def compare_versions(version1, version2):
 
 def check_tool(name, spec):
     """Check if a tool is available and meets version requirements"""
-    command = spec["command"][0]
+    return _check_tool_cached(name, tuple(spec["command"]), spec["min_version"])
+
+
+@lru_cache(maxsize=None)
+def _check_tool_cached(name, command_line, min_version):
+    """Memoized implementation of check_tool (specs are dicts, so not hashable)"""
+    command = command_line[0]
     
-    # Special handling for cl.exe which must be in the Visual Studio environment
-    if command == "cl" and platform.system() == "Windows":
+    # Special handling for cl.exe which must be in the Visual Studio environment;
+    # it is never run, since starting the compiler just to probe it is slow
+    if command == "cl":
         # Try to detect if running in VS Developer Command Prompt
         if "VSCMD_ARG_TGT_ARCH" not in os.environ:
             return False, "Visual Studio environment not activated"
         
         # Check if cl.exe is in PATH
-        if not check_command_exists(command):
+        cl_path = resolve_command("cl.exe")
+        if not cl_path:
             return False, "Not found in PATH"
-            
-        return True, "Visual Studio environment detected"
+        
+        return True, cl_path
     
     # Check if command exists
     if not check_command_exists(command):
         return False, "Not found in PATH"
     
+    # Special handling for vcpkg, whose output is not needed
+    if command == "vcpkg":
+        return True, "Available in PATH"
+    
     # Run the command to get version info
     try:
-        # Some commands output to stderr
+        # Some commands output to stderr, so read both through a single pipe
         result = subprocess.run(
-            spec["command"], 
-            capture_output=True, 
-            text=True, 
-            check=False
+            list(command_line),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            check=False,
+            timeout=10
         )
         
-        output = result.stdout or result.stderr
+        output = result.stdout
         
-        # Special handling for vcpkg
-        if command == "vcpkg":
-            return True, "Available in PATH"
-            
         # Check version if required
-        if spec["min_version"]:
-            if not compare_versions(output, spec["min_version"]):
-                return False, f"Version too old (need {spec['min_version']}+)"
+        if min_version:
+            if not compare_versions(output, min_version):
+                return False, f"Version too old (need {min_version}+)"
                 
         return True, output.split('\n')[0].strip()
     except Exception as e:
         return False, f"Error running command: {e}"
 
 
-def find_library_in_path(file_pattern):
-    """Check if a library exists in the system path"""
-    import fnmatch
-    import re
-    
-    system = platform.system().lower()
-    
-    # Determine which environment variable to check
-    if system == "windows":
-        path_var = "PATH"
-        separator = ";"
-    elif system == "darwin":
-        path_var = "DYLD_LIBRARY_PATH"
-        separator = ":"
-    else:  # Linux and others
-        path_var = "LD_LIBRARY_PATH"
-        separator = ":"
+@lru_cache(maxsize=None)
+def _list_dir(path):
+    """List the files in a directory once per run"""
+    try:
+        with os.scandir(path) as entries:
+            # Libraries are often symlinks (libssl.so -> libssl.so.3), so follow them;
+            # regular files are still classified from the directory entry without a stat
+            return tuple(entry.name for entry in entries if entry.is_file())
+    except OSError:
+        # Missing, not a directory, or not readable: one failed syscall instead of a pre-check
+        return ()
+
+
+def library_search_paths():
+    """Return the deduplicated directories searched for libraries"""
+    # Determine which environment variable to check (Linux and others use LD_LIBRARY_PATH)
+    path_var, separator = _PATH_VAR.get(_SYSTEM, _PATH_VAR["linux"])
     
     # Get the paths from environment
     paths = os.environ.get(path_var, "").split(separator)
     
     # Add standard system paths based on platform
-    if system == "windows":
+    if _SYSTEM == "windows":
         paths.extend([
             "C:\\Windows\\System32",
             "C:\\vcpkg\\installed\\x64-windows\\bin"
         ])
-    elif system == "darwin":
+    elif _SYSTEM == "darwin":
         paths.extend([
             "/usr/local/lib",
             "/usr/lib"
@@ -254,16 +337,20 @@ def find_library_in_path(file_pattern):
             "/usr/lib/x86_64-linux-gnu"
         ])
     
-    # Filter out empty paths
-    paths = [p for p in paths if p.strip()]
+    # Drop empty and duplicate paths, preserving order; missing ones are skipped by _list_dir
+    return list(dict.fromkeys(p for p in paths if p.strip()))
+
+
+@lru_cache(maxsize=None)
+def find_library_in_path(file_pattern):
+    """Check if a library exists in the system path"""
+    paths = library_search_paths()
     
     # Look for files matching pattern in paths
+    regex = re.compile(fnmatch.translate(file_pattern), re.IGNORECASE)
     for path in paths:
-        if not os.path.exists(path):
-            continue
-        
-        for file in os.listdir(path):
-            if fnmatch.fnmatch(file.lower(), file_pattern.lower()):
+        for file in _list_dir(path):
+            if regex.match(file):
                 return True, os.path.join(path, file)
     
     return False, "Not found in library paths"
@@ -271,141 +358,104 @@ def find_library_in_path(file_pattern):
 
 def check_cmake_modules():
     """Check if CMake can find required modules"""
-    system = platform.system().lower()
-    workspace_root = Path(__file__).resolve().parent.parent
-    build_dir = workspace_root / "build" / "cmake_test"
-    
-    # Create a temporary directory for CMake test
-    build_dir.mkdir(exist_ok=True, parents=True)
-    
-    # Create a test CMakeLists.txt file
-    test_cmake = build_dir / "CMakeLists.txt"
-    with open(test_cmake, "w") as f:
-        f.write("""
-cmake_minimum_required(VERSION 3.5)
-project(DrogonDependencyTest)
-
-# Find required packages
-find_package(OpenSSL)
-find_package(ZLIB)
-find_package(jsoncpp)
-find_package(UUID)
-
-# Configure a header to pass information to C++ code
-configure_file(
-    "${CMAKE_CURRENT_SOURCE_DIR}/config.h.in"
-    "${CMAKE_CURRENT_BINARY_DIR}/config.h"
-)
-
-# Create dummy output showing what was found
-message(STATUS "OpenSSL found: ${OPENSSL_FOUND}")
-message(STATUS "ZLIB found: ${ZLIB_FOUND}")
-message(STATUS "jsoncpp found: ${jsoncpp_FOUND}")
-message(STATUS "UUID found: ${UUID_FOUND}")
-""")
+    if not check_command_exists("cmake"):
+        return {package: False for package in CMAKE_TEST_PACKAGES}, "cmake not available"
     
-    # Create a configuration header template
-    config_header = build_dir / "config.h.in"
-    with open(config_header, "w") as f:
-        f.write("""
-#define OPENSSL_FOUND @OPENSSL_FOUND@
-#define ZLIB_FOUND @ZLIB_FOUND@
-#define JSONCPP_FOUND @jsoncpp_FOUND@
-#define UUID_FOUND @UUID_FOUND@
-""")
+    workspace_root = Path(__file__).resolve().parent.parent
     
     # Run cmake to test if it can find packages
     cmake_cmd = ["cmake", "."]
     
     # Add vcpkg toolchain on Windows
-    if system == "windows":
+    if _SYSTEM == "windows":
         vcpkg_path = "C:/vcpkg/scripts/buildsystems/vcpkg.cmake"
         if os.path.exists(vcpkg_path):
             cmake_cmd.extend(["-DCMAKE_TOOLCHAIN_FILE=" + vcpkg_path])
     
+    # One fixed test directory is reused; the CMake cache is dropped every time because
+    # find modules trust cached results and would keep reporting removed libraries
+    build_dir = workspace_root / "build" / "cmake_test"
+    build_dir.mkdir(exist_ok=True, parents=True)
+    (build_dir / "CMakeCache.txt").unlink(missing_ok=True)
+    shutil.rmtree(build_dir / "CMakeFiles", ignore_errors=True)
+    
+    # Create a test CMakeLists.txt file
+    (build_dir / "CMakeLists.txt").write_text(_CMAKE_TEST_LISTS)
+    
+    # Create a configuration header template
+    (build_dir / "config.h.in").write_text(_CMAKE_TEST_CONFIG_H)
+    
     try:
         result = subprocess.run(
             cmake_cmd,
             cwd=str(build_dir),
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
             text=True,
             check=False
         )
         
         # Check if packages were found
         packages_found = {
-            "OpenSSL": "OpenSSL found: 1" in result.stdout,
-            "ZLIB": "ZLIB found: 1" in result.stdout,
-            "jsoncpp": "jsoncpp found: 1" in result.stdout,
-            "UUID": "UUID found: 1" in result.stdout
+            package: f"{package} found: 1" in result.stdout
+            for package in CMAKE_TEST_PACKAGES
         }
         
         return packages_found, result.stdout
     except Exception as e:
-        return {
-            "OpenSSL": False,
-            "ZLIB": False,
-            "jsoncpp": False,
-            "UUID": False
-        }, f"Error running CMake test: {e}"
-    finally:
-        # Clean up test directory
-        try:
-            import shutil
-            shutil.rmtree(build_dir, ignore_errors=True)
-        except:
-            pass
+        return {package: False for package in CMAKE_TEST_PACKAGES}, f"Error running CMake test: {e}"
+
+
+def _prepend_paths(var, separator, paths_to_add):
+    """Prepend existing directories to a path variable, skipping ones already present"""
+    current = [p for p in os.environ.get(var, "").split(separator) if p]
+    existing = set(current)
+    new_paths = []
+    for path in paths_to_add:
+        if os.path.isdir(path) and path not in existing:
+            existing.add(path)
+            new_paths.append(path)
+    
+    # Later candidates end up first, as if each had been prepended in turn
+    value = separator.join(new_paths[::-1] + current)
+    os.environ[var] = value
+    return new_paths, value
 
 
 def update_environment_path():
     """Update environment path variables with common library locations"""
-    system = platform.system().lower()
-    
-    if system == "windows":
+    if _SYSTEM == "windows":
         # Add vcpkg and other common Windows paths
-        vcpkg_path = "C:\\vcpkg\\installed\\x64-windows\\bin"
-        if os.path.exists(vcpkg_path) and vcpkg_path not in os.environ.get("PATH", ""):
-            os.environ["PATH"] = f"{vcpkg_path};{os.environ.get('PATH', '')}"
-            print(f"Added to PATH: {vcpkg_path}")
-    elif system == "darwin":
+        added, _ = _prepend_paths(*_PATH_VAR["windows"], ["C:\\vcpkg\\installed\\x64-windows\\bin"])
+        for path in added:
+            print(f"Added to PATH: {path}")
+    elif _SYSTEM == "darwin":
         # Add Homebrew and other common macOS paths
-        paths_to_add = [
+        _, current_path = _prepend_paths(*_PATH_VAR["darwin"], [
             "/usr/local/lib",
             "/usr/local/opt/openssl/lib",
             "/usr/local/opt/jsoncpp/lib"
-        ]
-        current_path = os.environ.get("DYLD_LIBRARY_PATH", "")
-        for path in paths_to_add:
-            if os.path.exists(path) and path not in current_path:
-                current_path = f"{path}:{current_path}" if current_path else path
-        os.environ["DYLD_LIBRARY_PATH"] = current_path
+        ])
         print(f"Updated DYLD_LIBRARY_PATH: {current_path}")
     else:  # Linux
         # Add common Linux paths
-        paths_to_add = [
+        _, current_path = _prepend_paths(*_PATH_VAR["linux"], [
             "/usr/local/lib",
             "/usr/lib",
             "/usr/lib/x86_64-linux-gnu"
-        ]
-        current_path = os.environ.get("LD_LIBRARY_PATH", "")
-        for path in paths_to_add:
-            if os.path.exists(path) and path not in current_path:
-                current_path = f"{path}:{current_path}" if current_path else path
-        os.environ["LD_LIBRARY_PATH"] = current_path
+        ])
         print(f"Updated LD_LIBRARY_PATH: {current_path}")
 
 
 def fix_missing_dependencies():
     """Attempt to fix missing dependencies"""
-    system = platform.system().lower()
-    
-    if system == "windows":
+    if _SYSTEM == "windows":
         print("\nTo fix missing dependencies on Windows, try running:")
         print(colored("  cd C:\\vcpkg", "CYAN"))
         print(colored("  .\\vcpkg install jsoncpp:x64-windows zlib:x64-windows openssl:x64-windows uuid:x64-windows", "CYAN"))
         print(colored("  .\\vcpkg install brotli:x64-windows sqlite3:x64-windows libpq:x64-windows libmysql:x64-windows", "CYAN"))
         print(colored("  .\\vcpkg integrate install", "CYAN"))
-    elif system == "darwin":
+    elif _SYSTEM == "darwin":
         print("\nTo fix missing dependencies on macOS, try running:")
         print(colored("  brew install cmake jsoncpp ossp-uuid zlib openssl brotli", "CYAN"))
         print(colored("  brew install sqlite3 postgresql mysql hiredis yaml-cpp", "CYAN"))
@@ -425,9 +475,8 @@ def fix_missing_dependencies():
 def check_enviro_script_setup():
     """Check if environment setup scripts are properly installed"""
     workspace_root = Path(__file__).resolve().parent.parent
-    system = platform.system().lower()
     
-    if system == "windows":
+    if _SYSTEM == "windows":
         setup_script = workspace_root / "setup_env.ps1"
         if not setup_script.exists():
             print(colored("Warning: setup_env.ps1 not found. Environment setup script is missing.", "YELLOW"))
@@ -460,16 +509,36 @@ def check_vscode_integration():
     return True
 
 
-def main():
+def parse_args(argv=None):
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Verify the Drogon build environment.")
+    parser.add_argument("--fast", action="store_true",
+                        help="skip the CMake module check")
+    parser.add_argument("--no-libs", action="store_true",
+                        help="skip the library path scan")
+    parser.add_argument("--json-only", action="store_true",
+                        help="print nothing, only write the JSON report (exit code gives the result)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main function that checks all dependencies and environment"""
+    args = parse_args(argv)
+    if args.json_only:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return run_verification(args)
+    return run_verification(args)
+
+
+def run_verification(args):
+    """Run all checks, print the results and write the JSON report"""
     print_header("DROGON ENVIRONMENT VERIFICATION")
     
     # Update environment paths first to improve detection
     update_environment_path()
     
     # Detect system
-    system = platform.system().lower()
-    print(f"Detected platform: {colored(system.capitalize(), 'BOLD')}")
+    print(f"Detected platform: {colored(_SYSTEM.capitalize(), 'BOLD')}")
     
     # Check basic environment setup
     print_header("CHECKING ENVIRONMENT SETUP")
@@ -481,47 +550,49 @@ def main():
     print_result("VSCode integration", "PASS" if vscode_integration else "WARN",
                 "VSCode settings found" if vscode_integration else "VSCode settings incomplete")
     
+    # Run all tool and library probes concurrently; they are I/O bound
+    tools = list(COMMON_REQUIRED.items()) + list(PLATFORM_REQUIRED.get(_SYSTEM, {}).items())
+    libraries = [] if args.no_libs else REQUIRED_LIBRARIES.get(_SYSTEM, [])
+    # Each library directory is listed by exactly one task; lru_cache does not merge
+    # concurrent misses, so the pattern matching runs afterwards against the cached listings
+    lib_dirs = library_search_paths() if libraries else []
+    with ThreadPoolExecutor(max_workers=min(16, len(tools) + len(lib_dirs))) as executor:
+        tool_futures = {name: executor.submit(check_tool, name, spec) for name, spec in tools}
+        for path in lib_dirs:
+            executor.submit(_list_dir, path)
+    
+    # Collect every result once; the printout and the JSON report both read from these
+    tool_results = {name: tool_futures[name].result() for name, _ in tools}
+    lib_results = {lib["name"]: find_library_in_path(lib["file_pattern"]) for lib in libraries}
+    
     # Check required tools
     print_header("CHECKING REQUIRED TOOLS")
-    all_tools_available = True
-    
-    # Check common required tools
-    for name, spec in COMMON_REQUIRED.items():
-        success, message = check_tool(name, spec)
+    for name, spec in tools:
+        success, message = tool_results[name]
         print_result(spec["name"], "PASS" if success else "FAIL", message)
-        if not success:
-            all_tools_available = False
-    
-    # Check platform-specific tools
-    if system in PLATFORM_REQUIRED:
-        for name, spec in PLATFORM_REQUIRED[system].items():
-            success, message = check_tool(name, spec)
-            print_result(spec["name"], "PASS" if success else "FAIL", message)
-            if not success:
-                all_tools_available = False
+    all_tools_available = all(success for success, _ in tool_results.values())
     
     # Check libraries
-    print_header("CHECKING REQUIRED LIBRARIES")
-    all_libs_available = True
-    
-    if system in REQUIRED_LIBRARIES:
-        for lib in REQUIRED_LIBRARIES[system]:
-            success, path = find_library_in_path(lib["file_pattern"])
+    if not args.no_libs:
+        print_header("CHECKING REQUIRED LIBRARIES")
+        for lib_name, (success, path) in lib_results.items():
             if success:
-                print_result(lib["name"], "PASS", f"Found at {path}")
+                print_result(lib_name, "PASS", f"Found at {path}")
             else:
-                print_result(lib["name"], "FAIL", path)
-                all_libs_available = False
+                print_result(lib_name, "FAIL", path)
+    all_libs_available = all(success for success, _ in lib_results.values())
     
     # Check CMake modules
-    print_header("CHECKING CMAKE MODULES")
-    cmake_packages, cmake_output = check_cmake_modules()
-    
-    for package, found in cmake_packages.items():
-        print_result(package, "PASS" if found else "FAIL", 
-                    "CMake can find package" if found else "Package not found by CMake")
-        if not found:
-            all_libs_available = False
+    cmake_packages = {}
+    if not args.fast:
+        print_header("CHECKING CMAKE MODULES")
+        cmake_packages, cmake_output = check_cmake_modules()
+        
+        for package, found in cmake_packages.items():
+            print_result(package, "PASS" if found else "FAIL", 
+                        "CMake can find package" if found else "Package not found by CMake")
+            if not found:
+                all_libs_available = False
     
     # Summary and recommendations
     print_header("SUMMARY")
@@ -537,10 +608,16 @@ def main():
     # Create a JSON report
     workspace_root = Path(__file__).resolve().parent.parent
     report = {
-        "timestamp": str(datetime.now().isoformat()),
-        "platform": system,
-        "tools": {},
-        "libraries": {},
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "platform": _SYSTEM,
+        "tools": {
+            name: {"available": success, "message": message}
+            for name, (success, message) in tool_results.items()
+        },
+        "libraries": {
+            lib_name: {"available": success, "path": path if success else None}
+            for lib_name, (success, path) in lib_results.items()
+        },
         "cmake_packages": cmake_packages,
         "environment_setup": {
             "scripts_setup": enviro_script_setup,
@@ -548,36 +625,13 @@ def main():
         }
     }
     
-    # Add tools to report
-    for name, spec in COMMON_REQUIRED.items():
-        success, message = check_tool(name, spec)
-        report["tools"][name] = {
-            "available": success,
-            "message": message
-        }
-    
-    # Add platform-specific tools
-    if system in PLATFORM_REQUIRED:
-        for name, spec in PLATFORM_REQUIRED[system].items():
-            success, message = check_tool(name, spec)
-            report["tools"][name] = {
-                "available": success,
-                "message": message
-            }
-    
-    # Add libraries
-    if system in REQUIRED_LIBRARIES:
-        for lib in REQUIRED_LIBRARIES[system]:
-            success, path = find_library_in_path(lib["file_pattern"])
-            report["libraries"][lib["name"]] = {
-                "available": success,
-                "path": path if success else None
-            }
-    
     # Save report
     report_file = workspace_root / "scripts" / "environment_report.json"
-    with open(report_file, "w") as f:
-        json.dump(report, f, indent=2)
+    if _HAS_ORJSON:
+        report_file.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    else:
+        with open(report_file, "w") as f:
+            json.dump(report, f, indent=2)
     
     print(f"\nDetailed report saved to: {report_file}")
     return 0 if all_tools_available and all_libs_available else 1
@@ -585,7 +639,6 @@ def main():
 
 if __name__ == "__main__":
     try:
-        from datetime import datetime
         sys.exit(main())
     except KeyboardInterrupt:
         print("\nVerification cancelled by user.")